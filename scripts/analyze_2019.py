@@ -2,9 +2,15 @@
 """Analyze 2019 Cyclistic trip data (Q1-Q4 CSVs) with standard library only."""
 from __future__ import annotations
 
+import argparse
 import csv
+import os
+import pickle
+import time
 from collections import defaultdict, Counter
 from datetime import datetime
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
 
 RAW_DIR = Path('/Users/benledwon/Desktop/Github_connection/bike_share/data/raw')
@@ -12,6 +18,10 @@ OUT_DIR = Path('/Users/benledwon/Desktop/Github_connection/bike_share/data/proce
 
 FILES = sorted(RAW_DIR.glob('Trips_2019_Q*.csv'))
 
+CHECKPOINT_PATH = RAW_DIR.parent / 'analyze_2019.ckpt'
+CHECKPOINT_VERSION = 2
+CHECKPOINT_CHECK_ROWS = 10_000  # how often to look at the clock
+
 # Normalize column names for Q2
 Q2_MAP = {
     '01 - Rental Details Rental ID': 'trip_id',
@@ -30,6 +40,9 @@ Q2_MAP = {
 
 DAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
 
+# Only these columns feed the metrics; everything else is never decoded
+SCAN_COLUMNS = ('usertype', 'start_time', 'tripduration', 'from_station_id', 'to_station_id', 'from_station_name')
+
 
 def parse_datetime(value: str) -> datetime | None:
     if not value:
@@ -61,11 +74,33 @@ def parse_duration_seconds(value: str) -> int | None:
         return None
 
 
-def normalize_row(row: dict) -> dict:
-    if 'trip_id' in row:
-        return row
-    # Q2 mapping
-    return {Q2_MAP.get(k, k): v for k, v in row.items()}
+def scan_fields(path: Path, skip_rows: int = 0, columns: tuple[str, ...] = SCAN_COLUMNS):
+    """Yield a tuple of the requested column values for each data row.
+
+    Rows are read with csv.reader and picked with a fixed itemgetter, so no
+    per-row dict is built. Columns missing from a file read as ''. The first
+    `skip_rows` data rows are skipped, which is how checkpoints resume.
+    """
+    with path.open('r', newline='') as f:
+        reader = csv.reader(f)
+        header = [Q2_MAP.get(h, h) for h in next(reader, [])]
+        indexes = [header.index(c) if c in header else None for c in columns]
+        width = len(header)
+        if None in indexes:
+            # Point missing columns at a padding cell appended to each row
+            indexes = [width if i is None else i for i in indexes]
+            width += 1
+        pick = itemgetter(*indexes)
+
+        if skip_rows:
+            # Blank lines are not rows (DictReader skips them too)
+            next(islice(filter(None, reader), skip_rows - 1, None), None)
+        for row in reader:
+            if len(row) < width:
+                if not row:
+                    continue
+                row += [''] * (width - len(row))
+            yield pick(row)
 
 
 def usertype_bucket(usertype: str) -> str:
@@ -87,6 +122,43 @@ def write_csv(path: Path, headers: list[str], rows: list[list]):
         writer.writerows(rows)
 
 
+def file_signature(path: Path) -> tuple[str, int, int]:
+    st = path.stat()
+    return (path.name, st.st_size, st.st_mtime_ns)
+
+
+def save_checkpoint(path: Path, payload: dict):
+    # Write to a temp file and rename so a crash never leaves a torn snapshot
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.parent.mkdir(parents=True, exist_ok=True)
+    with tmp.open('wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: Path, files: list[Path]) -> dict | None:
+    try:
+        with path.open('rb') as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if payload.get('version') != CHECKPOINT_VERSION:
+        return None
+    # Only resume against the exact same raw inputs
+    if payload.get('files') != [file_signature(p) for p in files]:
+        return None
+    return payload
+
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--resume', action='store_true', help='continue from the last checkpoint if one matches the raw files')
+parser.add_argument('--checkpoint-rows', type=int, default=500_000, help='snapshot at least every N rows (default: 500000)')
+parser.add_argument('--checkpoint-seconds', type=float, default=30.0, help='snapshot at least every M seconds (default: 30)')
+args = parser.parse_args()
+
+
 # Aggregations
 counts_by_user = Counter()
 ride_sum_by_user = defaultdict(int)
@@ -120,77 +192,142 @@ row_count = 0
 bad_time_rows = 0
 bad_duration_rows = 0
 
-for file in FILES:
-    with file.open('r', newline='') as f:
-        reader = csv.DictReader(f)
-        for raw_row in reader:
-            row_count += 1
-            row = normalize_row(raw_row)
-
-            usertype_raw = (row.get('usertype') or '').strip()
-            unique_usertypes[usertype_raw] += 1
-            user_bucket = usertype_bucket(usertype_raw)
-
-            start_time = parse_datetime(row.get('start_time', ''))
-            if start_time is None:
-                bad_time_rows += 1
-                continue
-
-            duration = parse_duration_seconds(row.get('tripduration', ''))
-            if duration is None or duration < 0:
-                bad_duration_rows += 1
-                continue
-
-            # Core counts
-            counts_by_user[user_bucket] += 1
-            ride_sum_by_user[user_bucket] += duration
-            ride_count_by_user[user_bucket] += 1
-
-            prev_min = ride_min_by_user[user_bucket]
-            prev_max = ride_max_by_user[user_bucket]
-            ride_min_by_user[user_bucket] = duration if prev_min is None else min(prev_min, duration)
-            ride_max_by_user[user_bucket] = duration if prev_max is None else max(prev_max, duration)
-
-            # Day of week
-            day = DAY_NAMES[start_time.weekday()]  # Mon..Sun
-            counts_by_day_user[(day, user_bucket)] += 1
-            ride_sum_by_day_user[(day, user_bucket)] += duration
-            ride_count_by_day_user[(day, user_bucket)] += 1
-
-            # Hour
-            counts_by_hour_user[(start_time.hour, user_bucket)] += 1
-
-            # Month
-            counts_by_month_user[(start_time.month, user_bucket)] += 1
-
-            # Weekend vs weekday
-            if start_time.weekday() >= 5:
-                weekend_counts_by_user[user_bucket] += 1
-            else:
-                weekday_counts_by_user[user_bucket] += 1
-
-            # Commute windows (weekday 7-9 and 16-18)
-            if start_time.weekday() < 5 and (7 <= start_time.hour <= 9 or 16 <= start_time.hour <= 18):
-                commute_counts_by_user[user_bucket] += 1
-
-            # Round trips (same start/end)
-            if (row.get('from_station_id') or '').strip() and (row.get('to_station_id') or '').strip():
-                if row.get('from_station_id') == row.get('to_station_id'):
-                    round_trip_counts_by_user[user_bucket] += 1
-
-            # Long ride shares
-            if duration > 30 * 60:
-                long_ride_30_counts_by_user[user_bucket] += 1
-            if duration > 60 * 60:
-                long_ride_60_counts_by_user[user_bucket] += 1
-
-            # Start station counts
-            start_station = (row.get('from_station_name') or '').strip()
-            if start_station:
-                if user_bucket == 'member':
-                    start_station_counts_member[start_station] += 1
-                elif user_bucket == 'casual':
-                    start_station_counts_casual[start_station] += 1
+# Mutable aggregates captured in checkpoints (scalars are saved separately)
+AGGREGATES = {
+    'counts_by_user': counts_by_user,
+    'ride_sum_by_user': ride_sum_by_user,
+    'ride_count_by_user': ride_count_by_user,
+    'ride_min_by_user': ride_min_by_user,
+    'ride_max_by_user': ride_max_by_user,
+    'counts_by_day_user': counts_by_day_user,
+    'ride_sum_by_day_user': ride_sum_by_day_user,
+    'ride_count_by_day_user': ride_count_by_day_user,
+    'counts_by_hour_user': counts_by_hour_user,
+    'counts_by_month_user': counts_by_month_user,
+    'weekend_counts_by_user': weekend_counts_by_user,
+    'weekday_counts_by_user': weekday_counts_by_user,
+    'commute_counts_by_user': commute_counts_by_user,
+    'round_trip_counts_by_user': round_trip_counts_by_user,
+    'long_ride_30_counts_by_user': long_ride_30_counts_by_user,
+    'long_ride_60_counts_by_user': long_ride_60_counts_by_user,
+    'start_station_counts_member': start_station_counts_member,
+    'start_station_counts_casual': start_station_counts_casual,
+    'unique_usertypes': unique_usertypes,
+}
+
+file_signatures = [file_signature(p) for p in FILES]
+resume_file_index = 0
+resume_file_row = 0
+
+if args.resume:
+    checkpoint = load_checkpoint(CHECKPOINT_PATH, FILES)
+    if checkpoint is None:
+        print('No usable checkpoint found; starting from the beginning.')
+    else:
+        for name, values in checkpoint['aggregates'].items():
+            AGGREGATES[name].update(values)
+        row_count = checkpoint['row_count']
+        bad_time_rows = checkpoint['bad_time_rows']
+        bad_duration_rows = checkpoint['bad_duration_rows']
+        resume_file_index = checkpoint['file_index']
+        resume_file_row = checkpoint['file_row']
+        print(f'Resuming at {FILES[resume_file_index].name} row {resume_file_row} ({row_count} rows done).')
+
+last_checkpoint_rows = row_count
+last_checkpoint_time = time.monotonic()
+next_checkpoint_check = row_count + CHECKPOINT_CHECK_ROWS
+
+for file_index, file in enumerate(FILES):
+    if file_index < resume_file_index:
+        continue
+    skip_rows = resume_file_row if file_index == resume_file_index else 0
+    for file_row, fields in enumerate(scan_fields(file, skip_rows), start=skip_rows):
+        # Snapshot before counting this row so `file_row` is exactly where to resume
+        if row_count >= next_checkpoint_check:
+            next_checkpoint_check = row_count + CHECKPOINT_CHECK_ROWS
+            now = time.monotonic()
+            if (row_count - last_checkpoint_rows >= args.checkpoint_rows
+                    or now - last_checkpoint_time >= args.checkpoint_seconds):
+                save_checkpoint(CHECKPOINT_PATH, {
+                    'version': CHECKPOINT_VERSION,
+                    'files': file_signatures,
+                    'file_index': file_index,
+                    'file_row': file_row,
+                    'row_count': row_count,
+                    'bad_time_rows': bad_time_rows,
+                    'bad_duration_rows': bad_duration_rows,
+                    'aggregates': {name: dict(agg) for name, agg in AGGREGATES.items()},
+                })
+                last_checkpoint_rows = row_count
+                last_checkpoint_time = now
+
+        usertype_raw, start_raw, duration_raw, from_station_id, to_station_id, from_station_name = fields
+        row_count += 1
+
+        usertype_raw = usertype_raw.strip()
+        unique_usertypes[usertype_raw] += 1
+        user_bucket = usertype_bucket(usertype_raw)
+
+        start_time = parse_datetime(start_raw)
+        if start_time is None:
+            bad_time_rows += 1
+            continue
+
+        duration = parse_duration_seconds(duration_raw)
+        if duration is None or duration < 0:
+            bad_duration_rows += 1
+            continue
+
+        # Core counts
+        counts_by_user[user_bucket] += 1
+        ride_sum_by_user[user_bucket] += duration
+        ride_count_by_user[user_bucket] += 1
+
+        prev_min = ride_min_by_user[user_bucket]
+        prev_max = ride_max_by_user[user_bucket]
+        ride_min_by_user[user_bucket] = duration if prev_min is None else min(prev_min, duration)
+        ride_max_by_user[user_bucket] = duration if prev_max is None else max(prev_max, duration)
+
+        # Day of week
+        day = DAY_NAMES[start_time.weekday()]  # Mon..Sun
+        counts_by_day_user[(day, user_bucket)] += 1
+        ride_sum_by_day_user[(day, user_bucket)] += duration
+        ride_count_by_day_user[(day, user_bucket)] += 1
+
+        # Hour
+        counts_by_hour_user[(start_time.hour, user_bucket)] += 1
+
+        # Month
+        counts_by_month_user[(start_time.month, user_bucket)] += 1
+
+        # Weekend vs weekday
+        if start_time.weekday() >= 5:
+            weekend_counts_by_user[user_bucket] += 1
+        else:
+            weekday_counts_by_user[user_bucket] += 1
+
+        # Commute windows (weekday 7-9 and 16-18)
+        if start_time.weekday() < 5 and (7 <= start_time.hour <= 9 or 16 <= start_time.hour <= 18):
+            commute_counts_by_user[user_bucket] += 1
+
+        # Round trips (same start/end)
+        if from_station_id.strip() and to_station_id.strip():
+            if from_station_id == to_station_id:
+                round_trip_counts_by_user[user_bucket] += 1
+
+        # Long ride shares
+        if duration > 30 * 60:
+            long_ride_30_counts_by_user[user_bucket] += 1
+        if duration > 60 * 60:
+            long_ride_60_counts_by_user[user_bucket] += 1
+
+        # Start station counts
+        start_station = from_station_name.strip()
+        if start_station:
+            if user_bucket == 'member':
+                start_station_counts_member[start_station] += 1
+            elif user_bucket == 'casual':
+                start_station_counts_casual[start_station] += 1
 
 
 # Build outputs
@@ -333,4 +470,7 @@ write_csv(
     ] + [[f'usertype_raw:{k}', v] for k, v in unique_usertypes.most_common()],
 )
 
+# Outputs are complete; a stale snapshot must not be resumed later
+CHECKPOINT_PATH.unlink(missing_ok=True)
+
 print('Done.')
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Load-test serve_aggregates.py and report latency percentiles."""
+from __future__ import annotations
+
+import argparse
+import http.client
+import itertools
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+PATHS = [
+    '/summary',
+    '/rides?by=hour&user=casual',
+    '/rides?by=hour&user=member',
+    '/rides?by=day&user=casual',
+    '/rides?by=month',
+    '/avg_ride?by=day&user=member',
+    '/shares?kind=commute',
+    '/shares?kind=long_ride&user=casual',
+    '/stations/top?user=member&n=20',
+    '/stations/top?user=casual&n=5',
+    '/metadata',
+]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def worker(host: str, port: int, requests: int, paths, lock: threading.Lock, latencies: list, errors: list):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    local = []
+    try:
+        for _ in range(requests):
+            with lock:
+                path = next(paths)
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                resp = conn.getresponse()
+                resp.read()
+            except (OSError, http.client.HTTPException) as exc:
+                errors.append(f'{path}: {exc}')
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            elapsed = time.perf_counter() - start
+            if resp.status != 200:
+                # Error responses would skew the percentiles; count them only
+                errors.append(f'{path}: HTTP {resp.status}')
+                continue
+            local.append(elapsed)
+    finally:
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=200, help='concurrent clients (default: 200)')
+    parser.add_argument('--requests', type=int, default=20000, help='total requests (default: 20000)')
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    host, port = url.hostname or '127.0.0.1', url.port or 80
+    paths = itertools.cycle(PATHS)
+    lock = threading.Lock()
+    latencies: list[float] = []
+    errors: list[str] = []
+
+    per_worker, extra = divmod(args.requests, args.concurrency)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(worker, host, port, per_worker + (1 if i < extra else 0), paths, lock, latencies, errors)
+            for i in range(args.concurrency)
+        ]
+    elapsed = time.perf_counter() - started
+    crashed = []
+    for future in futures:
+        try:
+            future.result()
+        except Exception as exc:  # a dead worker's requests would otherwise vanish silently
+            crashed.append(exc)
+
+    latencies.sort()
+    print(f'requests:    {len(latencies)} ok, {len(errors)} errors in {elapsed:.2f}s')
+    print(f'throughput:  {len(latencies) / elapsed:.0f} req/s with {args.concurrency} clients')
+    for label, pct in (('p50', 50), ('p90', 90), ('p99', 99)):
+        print(f'{label}:         {percentile(latencies, pct) * 1000:.2f} ms')
+    if latencies:
+        print(f'max:         {latencies[-1] * 1000:.2f} ms')
+    for err in errors[:10]:
+        print(f'error: {err}')
+    if crashed:
+        print(f'{len(crashed)} of {args.concurrency} workers crashed; their remaining requests were not sent')
+        for exc in crashed[:5]:
+            print(f'worker error: {exc!r}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Run analyze -> Excel/PNG stages, skipping any whose inputs are unchanged.
+
+Each stage's input and output files are content-hashed and recorded in
+data/.pipeline_state.json. A stage reruns only when an input hash differs
+from the last successful run or an output is missing or was modified.
+Independent stages (Excel and PNG) run concurrently.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+BASE = Path('/Users/benledwon/Desktop/Github_connection/bike_share')
+RAW = BASE / 'data' / 'raw'
+PROCESSED = BASE / 'data' / 'processed'
+FIGURES = BASE / 'figures'
+SCRIPTS = Path(__file__).resolve().parent
+STATE_PATH = BASE / 'data' / '.pipeline_state.json'
+STATE_VERSION = 1
+
+
+@dataclass
+class Stage:
+    name: str
+    script: Path
+    inputs: list[Path]
+    outputs: list[Path]
+    deps: list[str] = field(default_factory=list)
+
+    def input_paths(self) -> list[Path]:
+        # Raw inputs are globbed at run time so new quarters are picked up
+        paths = [self.script]
+        for p in self.inputs:
+            paths.extend(sorted(p.parent.glob(p.name)) if '*' in p.name else [p])
+        return paths
+
+    def missing_inputs(self) -> list[str]:
+        # A glob matching nothing is missing too: running analyze on zero raw
+        # files would overwrite data/processed/ with empty tables
+        missing = [] if self.script.exists() else [self.script.name]
+        for p in self.inputs:
+            if '*' in p.name:
+                if next(p.parent.glob(p.name), None) is None:
+                    missing.append(f'{p.name} (no files match in {p.parent})')
+            elif not p.exists():
+                missing.append(p.name)
+        return missing
+
+
+def processed(*names: str) -> list[Path]:
+    return [PROCESSED / n for n in names]
+
+
+STAGES = [
+    Stage(
+        name='analyze',
+        script=SCRIPTS / 'analyze_2019.py',
+        inputs=[RAW / 'Trips_2019_Q*.csv'],
+        outputs=processed(
+            'summary_overall.csv',
+            'rides_by_day_user.csv',
+            'avg_ride_seconds_by_day_user.csv',
+            'rides_by_hour_user.csv',
+            'rides_by_month_user.csv',
+            'commute_share_weekday.csv',
+            'round_trip_share.csv',
+            'long_ride_share.csv',
+            'top_start_stations_member.csv',
+            'top_start_stations_casual.csv',
+            'analysis_metadata.csv',
+        ),
+    ),
+    Stage(
+        name='excel',
+        script=SCRIPTS / 'create_excel_charts.py',
+        inputs=processed(
+            'summary_overall.csv',
+            'rides_by_day_user.csv',
+            'avg_ride_seconds_by_day_user.csv',
+            'rides_by_hour_user.csv',
+            'rides_by_month_user.csv',
+            'commute_share_weekday.csv',
+            'round_trip_share.csv',
+            'long_ride_share.csv',
+        ),
+        outputs=[FIGURES / 'cyclistic_2019_charts.xlsx'],
+        deps=['analyze'],
+    ),
+    Stage(
+        name='png',
+        script=SCRIPTS / 'export_charts_png.py',
+        inputs=processed(
+            'rides_by_day_user.csv',
+            'avg_ride_seconds_by_day_user.csv',
+            'rides_by_month_user.csv',
+            'rides_by_hour_user.csv',
+            'summary_overall.csv',
+            'long_ride_share.csv',
+        ),
+        outputs=[
+            FIGURES / 'rides_by_day.png',
+            FIGURES / 'avg_ride_by_day.png',
+            FIGURES / 'rides_by_month.png',
+            FIGURES / 'rides_by_hour.png',
+            FIGURES / 'weekend_weekday_share.png',
+            FIGURES / 'long_ride_share.png',
+        ],
+        deps=['analyze'],
+    ),
+]
+
+
+class FileHasher:
+    """sha256 of file contents, memoized on (size, mtime) across runs.
+
+    Raw quarterly CSVs are hundreds of MB; an unchanged stat means they are
+    not re-read, so a no-op refresh costs a few stat calls.
+    """
+
+    def __init__(self, cache: dict):
+        self.cache = cache
+
+    def digest(self, path: Path) -> str | None:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        key = str(path)
+        cached = self.cache.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        with path.open('rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.cache[key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def digests(self, paths: list[Path]) -> dict[str, str | None]:
+        return {str(p): self.digest(p) for p in paths}
+
+
+def load_state(path: Path) -> dict:
+    try:
+        with path.open() as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {'version': STATE_VERSION, 'stages': {}, 'hashes': {}}
+    if state.get('version') != STATE_VERSION:
+        return {'version': STATE_VERSION, 'stages': {}, 'hashes': {}}
+    return state
+
+
+def save_state(path: Path, state: dict):
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.parent.mkdir(parents=True, exist_ok=True)
+    with tmp.open('w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def stale_reason(stage: Stage, record: dict | None, hasher: FileHasher) -> str | None:
+    if record is None:
+        return 'never run'
+    inputs = hasher.digests(stage.input_paths())
+    if inputs != record.get('inputs'):
+        changed = sorted(set(inputs.items()) ^ set(record.get('inputs', {}).items()))
+        return f'input changed: {Path(changed[0][0]).name}' if changed else 'inputs changed'
+    outputs = hasher.digests(stage.outputs)
+    for p, d in outputs.items():
+        if d is None:
+            return f'missing output {Path(p).name}'
+        if d != record.get('outputs', {}).get(p):
+            return f'output modified: {Path(p).name}'
+    return None
+
+
+def run_stage(stage: Stage, extra_args: list[str]) -> tuple[int, float, str]:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, str(stage.script), *extra_args],
+        cwd=BASE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    return proc.returncode, time.perf_counter() - start, proc.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--force', nargs='*', metavar='STAGE', help='rerun the named stages (all if none given)')
+    parser.add_argument('--dry-run', action='store_true', help='report what would run without running it')
+    parser.add_argument('--resume', action='store_true', help='pass --resume to analyze_2019.py')
+    args = parser.parse_args()
+
+    names = [s.name for s in STAGES]
+    forced = set(names if args.force == [] else args.force or [])
+    unknown = forced - set(names)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}; expected {', '.join(names)}")
+
+    state = load_state(STATE_PATH)
+    hasher = FileHasher(state['hashes'])
+    stage_args = {'analyze': ['--resume'] if args.resume else []}
+
+    pending = {s.name: s for s in STAGES}
+    done: dict[str, str] = {}  # name -> 'ran' | 'skipped' | 'pending' | 'failed' | 'blocked'
+    report: list[tuple[str, str, float, str]] = []
+    total_start = time.perf_counter()
+
+    def decide(stage: Stage) -> str | None:
+        # Hash inputs only after upstream stages have finished writing them
+        if stage.name in forced:
+            return 'forced'
+        return stale_reason(stage, state['stages'].get(stage.name), hasher)
+
+    with ThreadPoolExecutor(max_workers=len(STAGES)) as pool:
+        running = {}
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if any(d not in done for d in stage.deps):
+                    continue
+                del pending[name]
+                if any(done[d] in ('failed', 'blocked') for d in stage.deps):
+                    done[name] = 'blocked'
+                    report.append((name, 'blocked', 0.0, 'upstream stage failed'))
+                    continue
+                if any(done[d] == 'pending' for d in stage.deps):
+                    # Inputs are about to be rewritten; current hashes say nothing
+                    done[name] = 'pending'
+                    report.append((name, 'would run', 0.0, 'upstream pending'))
+                    continue
+                missing = stage.missing_inputs()
+                if missing:
+                    # Checked before 'never run'/--force so nothing runs on absent inputs
+                    done[name] = 'failed'
+                    report.append((name, 'failed', 0.0, f"missing input: {', '.join(missing)}"))
+                    continue
+                check_start = time.perf_counter()
+                reason = decide(stage)
+                if reason is None:
+                    done[name] = 'skipped'
+                    report.append((name, 'skipped', time.perf_counter() - check_start, 'up to date'))
+                    continue
+                if args.dry_run:
+                    done[name] = 'pending'
+                    report.append((name, 'would run', 0.0, reason))
+                    continue
+                print(f'[{name}] running ({reason})', flush=True)
+                running[pool.submit(run_stage, stage, stage_args.get(name, []))] = (stage, reason)
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, reason = running.pop(future)
+                code, elapsed, output = future.result()
+                for line in output.splitlines():
+                    print(f'[{stage.name}] {line}')
+                if code != 0:
+                    done[stage.name] = 'failed'
+                    report.append((stage.name, 'failed', elapsed, f'exit code {code}'))
+                    state['stages'].pop(stage.name, None)
+                    continue
+                done[stage.name] = 'ran'
+                report.append((stage.name, 'ran', elapsed, reason))
+                state['stages'][stage.name] = {
+                    'inputs': hasher.digests(stage.input_paths()),
+                    'outputs': hasher.digests(stage.outputs),
+                }
+
+    if not args.dry_run:
+        save_state(STATE_PATH, state)
+
+    print()
+    print(f"{'stage':<10}{'status':<12}{'seconds':>9}  detail")
+    for name, status, elapsed, detail in sorted(report, key=lambda r: names.index(r[0])):
+        print(f'{name:<10}{status:<12}{elapsed:>9.2f}  {detail}')
+    print(f"{'total':<10}{'':<12}{time.perf_counter() - total_start:>9.2f}")
+
+    if any(status in ('failed', 'blocked') for status in done.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
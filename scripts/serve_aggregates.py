@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Serve the processed 2019 aggregates as JSON over HTTP (standard library only).
+
+Endpoints:
+  /summary?user=member
+  /rides?by=day|hour|month&user=casual
+  /avg_ride?by=day&user=member
+  /shares?kind=commute|round_trip|long_ride&user=casual
+  /stations/top?user=member&n=20
+  /metadata
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+BASE = Path('/Users/benledwon/Desktop/Github_connection/bike_share')
+PROCESSED = BASE / 'data' / 'processed'
+
+USER_TYPES = ('member', 'casual', 'unknown')
+
+RIDES_FILES = {
+    'day': 'rides_by_day_user.csv',
+    'hour': 'rides_by_hour_user.csv',
+    'month': 'rides_by_month_user.csv',
+}
+AVG_RIDE_FILES = {
+    'day': 'avg_ride_seconds_by_day_user.csv',
+}
+SHARE_FILES = {
+    'commute': 'commute_share_weekday.csv',
+    'round_trip': 'round_trip_share.csv',
+    'long_ride': 'long_ride_share.csv',
+}
+STATION_FILES = {
+    'member': 'top_start_stations_member.csv',
+    'casual': 'top_start_stations_casual.csv',
+}
+
+# Label columns are served verbatim; every other column is numeric
+STRING_COLUMNS = {'user_type', 'day_of_week', 'station_name', 'metric'}
+
+
+class QueryError(ValueError):
+    """Bad query parameters; reported to the client as HTTP 400."""
+
+
+def _parse_number(value: str | None):
+    if value is None:  # short row: DictReader fills missing cells with None
+        return None
+    v = value.strip()
+    try:
+        return int(v)
+    except ValueError:
+        pass
+    try:
+        number = float(v)
+    except ValueError:
+        return value
+    # NaN/Infinity have no JSON encoding; leave them as text
+    return number if math.isfinite(number) else value
+
+
+def read_table(path: Path) -> list[dict]:
+    with path.open(newline='') as f:
+        # Cells past the header land under the None key (a list); drop them
+        return [
+            {k: v if k in STRING_COLUMNS else _parse_number(v) for k, v in row.items() if k is not None}
+            for row in csv.DictReader(f)
+        ]
+
+
+class AggregateStore:
+    """Processed CSVs held in memory plus an LRU cache of encoded responses.
+
+    Both are dropped and reloaded whenever any CSV in the directory changes
+    mtime or size, so rerunning analyze_2019.py is picked up without a restart.
+    The directory is stat'd at most once per `refresh_interval` seconds.
+    """
+
+    def __init__(self, directory: Path, cache_size: int = 256, refresh_interval: float = 1.0):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._checked_at = float('-inf')
+        self._signature = None
+        self._tables: dict[str, list[dict]] = {}
+        self._cache: OrderedDict[tuple, bytes] = OrderedDict()
+        self.refresh()
+
+    def _current_signature(self) -> tuple:
+        with os.scandir(self.directory) as it:
+            stats = [(e.name, e.stat()) for e in it if e.name.endswith('.csv')]
+        return tuple(sorted((name, st.st_mtime_ns, st.st_size) for name, st in stats))
+
+    def refresh(self):
+        self._checked_at = time.monotonic()
+        signature = self._current_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            try:
+                tables = {name: read_table(self.directory / name) for name, _, _ in signature}
+            except (OSError, csv.Error, ValueError) as exc:
+                # Likely a CSV mid-rewrite; keep serving the previous tables and
+                # leave the signature alone so the next interval retries
+                print(f'reload of {self.directory} failed, keeping previous data: {exc!r}', file=sys.stderr)
+                return
+            self._tables = tables
+            self._cache.clear()
+            self._signature = signature
+
+    def table(self, name: str) -> list[dict]:
+        try:
+            return self._tables[name]
+        except KeyError:
+            raise FileNotFoundError(name) from None
+
+    def get(self, key: tuple, build) -> bytes:
+        if time.monotonic() - self._checked_at >= self.refresh_interval:
+            self.refresh()
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                return body
+            signature = self._signature
+        body = json.dumps(build(), separators=(',', ':'), allow_nan=False).encode('utf-8')
+        with self._lock:
+            if signature != self._signature:
+                return body  # tables were reloaded mid-build; don't cache stale data
+            self._cache[key] = body
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return body
+
+
+def _param(query: dict, name: str, choices=None, default=None, required=False) -> str | None:
+    values = query.get(name)
+    if not values:
+        if required:
+            raise QueryError(f'missing parameter: {name}')
+        return default
+    value = values[-1].strip().lower()
+    if choices is not None and value not in choices:
+        raise QueryError(f"invalid {name}={value!r}; expected one of {', '.join(choices)}")
+    return value
+
+
+def _filter_user(rows: list[dict], user: str | None) -> list[dict]:
+    if user is None:
+        return rows
+    return [r for r in rows if r['user_type'] == user]
+
+
+def build_summary(store: AggregateStore, query: dict):
+    user = _param(query, 'user', USER_TYPES)
+    return _filter_user(store.table('summary_overall.csv'), user)
+
+
+def build_rides(store: AggregateStore, query: dict):
+    by = _param(query, 'by', tuple(RIDES_FILES), required=True)
+    user = _param(query, 'user', USER_TYPES)
+    return _filter_user(store.table(RIDES_FILES[by]), user)
+
+
+def build_avg_ride(store: AggregateStore, query: dict):
+    by = _param(query, 'by', tuple(AVG_RIDE_FILES), default='day')
+    user = _param(query, 'user', USER_TYPES)
+    return _filter_user(store.table(AVG_RIDE_FILES[by]), user)
+
+
+def build_shares(store: AggregateStore, query: dict):
+    kind = _param(query, 'kind', tuple(SHARE_FILES), required=True)
+    user = _param(query, 'user', USER_TYPES)
+    return _filter_user(store.table(SHARE_FILES[kind]), user)
+
+
+def build_top_stations(store: AggregateStore, query: dict):
+    user = _param(query, 'user', tuple(STATION_FILES), required=True)
+    n = _param(query, 'n', default='20')
+    try:
+        n = int(n)
+    except ValueError:
+        raise QueryError(f'invalid n={n!r}; expected an integer') from None
+    if n < 1:
+        raise QueryError('n must be at least 1')
+    return store.table(STATION_FILES[user])[:n]
+
+
+def build_metadata(store: AggregateStore, query: dict):
+    return {r['metric']: r['value'] for r in store.table('analysis_metadata.csv')}
+
+
+ROUTES = {
+    '/summary': build_summary,
+    '/rides': build_rides,
+    '/avg_ride': build_avg_ride,
+    '/shares': build_shares,
+    '/stations/top': build_top_stations,
+    '/metadata': build_metadata,
+}
+
+
+class AggregateHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive for load tests and dashboards
+    store: AggregateStore
+    verbose = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        route = ROUTES.get(url.path.rstrip('/') or '/')
+        if route is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': f'unknown path: {url.path}', 'paths': sorted(ROUTES)})
+            return
+        query = parse_qs(url.query)
+        key = (url.path, tuple(sorted((k, tuple(v)) for k, v in query.items())))
+        try:
+            body = self.store.get(key, lambda: route(self.store, query))
+        except QueryError as exc:
+            self._send_json(HTTPStatus.BAD_REQUEST, {'error': str(exc)})
+            return
+        except FileNotFoundError as exc:
+            self._send_json(HTTPStatus.SERVICE_UNAVAILABLE, {'error': f'missing processed file: {exc}'})
+            return
+        except Exception as exc:
+            self.log_error('unhandled error for %s: %r', self.path, exc)
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'internal server error'})
+            return
+        self._send(HTTPStatus.OK, body)
+
+    def _send_json(self, status: HTTPStatus, payload):
+        self._send(status, json.dumps(payload, allow_nan=False).encode('utf-8'))
+
+    def _send(self, status: HTTPStatus, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def log_error(self, format, *args):
+        # Errors are always logged, even without --verbose
+        super().log_message(format, *args)
+
+
+class AggregateServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--processed-dir', type=Path, default=PROCESSED)
+    parser.add_argument('--cache-size', type=int, default=256, help='max cached responses (default: 256)')
+    parser.add_argument('--refresh-interval', type=float, default=1.0,
+                        help='seconds between checks for changed CSVs (default: 1)')
+    parser.add_argument('--verbose', action='store_true', help='log every request to stderr')
+    args = parser.parse_args()
+
+    AggregateHandler.store = AggregateStore(args.processed_dir, cache_size=args.cache_size, refresh_interval=args.refresh_interval)
+    AggregateHandler.verbose = args.verbose
+    server = AggregateServer((args.host, args.port), AggregateHandler)
+    print(f'Serving {args.processed_dir} on http://{args.host}:{args.port}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()